@@ -13,13 +13,12 @@
 # limitations under the License.
 
 import argparse
-import json
 import pathlib
 import sys
 import textwrap
 from typing import Any, cast
 
-from . import parse
+from . import parse, serialization
 from .exit_codes import ExitCode
 
 
@@ -67,6 +66,12 @@ def main() -> None:
             """
         ),
     )
+    parse_parser.add_argument(
+        "--input-format",
+        choices=["text", "json"],
+        default="text",
+        help="The format of the Mypy output. Use json for `mypy --output json`. Defaults to text.",
+    )
     parse_parser.add_argument(
         "-c",
         "--color",
@@ -82,8 +87,7 @@ def main() -> None:
 
 
 def _load_json_file(filepath: pathlib.Path) -> Any:
-    with filepath.open() as json_file:
-        return json.load(json_file)
+    return serialization.loads(filepath.read_bytes())
 
 
 def _parse_command(args: argparse.Namespace) -> None:
@@ -108,7 +112,16 @@ def _parse_command(args: argparse.Namespace) -> None:
         tracker = parse.ChangeTracker(old_report, report_writer=change_report_writer)
         processors.append(tracker)
 
-    exit_code = parse.parse_message_lines(processors, sys.stdin)
+    # The ErrorCounter only counts errors, so don't bother parsing notes.
+    # The ChangeTracker needs them, to show notes alongside new errors,
+    # and it needs the raw lines from mypy.
+    exit_code = parse.parse_message_lines(
+        processors,
+        sys.stdin,
+        keep_raw=tracker is not None,
+        errors_only=tracker is None,
+        input_format=args.input_format,
+    )
     sys.exit(exit_code)
 
 
@@ -12,45 +12,76 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-import itertools
-import json
 import operator
+import re
 import sys
 from collections import Counter, defaultdict
-from collections.abc import Iterable, Iterator
+from collections.abc import Iterable, Iterator, Sequence
 from dataclasses import dataclass
-from typing import Any, Callable, Protocol
+from typing import Any, Callable, Literal, Optional, Protocol
 
+from mypy_json_report import serialization
 from mypy_json_report.exit_codes import ExitCode
 
 
 ErrorSummary = dict[str, dict[str, int]]
+InputFormat = Literal["text", "json"]
+
+# Notes with these codes show them in mypy's text output (mypy's SHOW_NOTE_CODES).
+_NOTE_CODES_SHOWN = frozenset({"annotation-unchecked", "deprecated"})
 
 
 class MessageProcessor(Protocol):
     def process_messages(
-        self, filename: str, messages: list["MypyMessage"]
+        self, filename: str, messages: Sequence["MypyMessage"]
     ) -> None: ...
 
     def write_report(self) -> ExitCode: ...
 
 
 def parse_message_lines(
-    processors: list[MessageProcessor], lines: Iterable[str]
+    processors: list[MessageProcessor],
+    lines: Iterable[str],
+    *,
+    keep_raw: bool = True,
+    errors_only: bool = False,
+    input_format: InputFormat = "text",
 ) -> ExitCode:
-    messages = MypyMessage.from_lines(lines)
+    """
+    Parse lines of Mypy output, and send the messages to each processor.
 
-    # Sort the lines by the filename otherwise itertools.groupby() will make
-    # multiple groups for the same file name if the lines are out of order.
+    Pass keep_raw=False when none of the processors use MypyMessage.raw,
+    so that a copy of each line isn't held in memory.
+    Pass errors_only=True when none of the processors use notes,
+    so that they aren't parsed at all.
+    Pass input_format="json" for the output of `mypy --output json`.
+    """
+    if input_format == "json":
+        messages = MypyMessage.from_json_lines(
+            lines, keep_raw=keep_raw, errors_only=errors_only
+        )
+    else:
+        messages = MypyMessage.from_lines(
+            lines, keep_raw=keep_raw, errors_only=errors_only
+        )
+
+    # Sort the lines by the filename otherwise we will make multiple groups
+    # for the same file name if the lines are out of order.
     messages_sorted = sorted(messages, key=operator.attrgetter("filename"))
 
-    for filename, messages in itertools.groupby(
-        messages_sorted, key=operator.attrgetter("filename")
-    ):
-        # Send each line of the Mypy report to each processor.
-        message_group = list(messages)
-        for processor in processors:
-            processor.process_messages(filename, message_group)
+    # Group consecutive messages by filename. This is cheaper than
+    # itertools.groupby(), which calls a key function for every message.
+    filename = ""
+    message_group: list[MypyMessage] = []
+    for message in messages_sorted:
+        if message.filename != filename:
+            if message_group:
+                _process_file(processors, filename, message_group)
+            filename = message.filename
+            message_group = []
+        message_group.append(message)
+    if message_group:
+        _process_file(processors, filename, message_group)
 
     for processor in processors:
         exit_code = processor.write_report()
@@ -60,16 +91,44 @@ def parse_message_lines(
     return ExitCode.SUCCESS
 
 
+def _process_file(
+    processors: list[MessageProcessor], filename: str, messages: list["MypyMessage"]
+) -> None:
+    # Send each line of the Mypy report to each processor.
+    for processor in processors:
+        processor.process_messages(filename, messages)
+
+
 class FilenameWithoutLineNumberError(Exception):
     pass
 
 
+class InvalidJsonLineError(Exception):
+    pass
+
+
+def _filename_without_line_number_error(line: str) -> FilenameWithoutLineNumberError:
+    return FilenameWithoutLineNumberError(
+        "Error message from mypy contains a filename but no line number. "
+        "This is normally an indication of a file-level issue reported by mypy. "
+        "Please correct this and try again. The error emitted from mypy is:\n\n"
+        f"    {line}"
+    )
+
+
 class SkipLineError(Exception):
     pass
 
 
-@dataclass(frozen=True)
+@dataclass
 class MypyMessage:
+    # We create one of these for every line, so construction needs to be cheap.
+    # It isn't frozen: a frozen dataclass's __init__ calls object.__setattr__
+    # for every field, which more than doubles the cost of creating one.
+    # __slots__ avoids a per-instance __dict__.
+    # This can be replaced with dataclass(slots=True) when we drop Python 3.9.
+    __slots__ = ("filename", "line_number", "message", "message_type", "raw")
+
     filename: str
     line_number: int
     message: str
@@ -77,43 +136,132 @@ class MypyMessage:
     raw: str
 
     @classmethod
-    def from_lines(cls, lines: Iterable[str]) -> Iterator["MypyMessage"]:
-        """Given lines from mypy's output, yield a series of MypyMessage objects."""
+    def from_lines(
+        cls, lines: Iterable[str], *, keep_raw: bool = True, errors_only: bool = False
+    ) -> Iterator["MypyMessage"]:
+        """
+        Given lines from mypy's output, yield a series of MypyMessage objects.
+
+        When errors_only is True, other messages are skipped without being parsed,
+        though lines without a line number still raise as they do otherwise.
+        """
         for line in lines:
+            if errors_only and ": error: " not in line:
+                # These checks are much cheaper than parsing the line.
+                # Lines with no line number are left to _parse_line,
+                # which returns None for summaries and raises for the rest.
+                location, separator, _ = line.partition(": ")
+                if not separator or ":" in location:
+                    continue
+            message = cls._parse_line(line, keep_raw=keep_raw)
+            if message is not None:
+                yield message
+
+    @classmethod
+    def from_json_lines(
+        cls, lines: Iterable[str], *, keep_raw: bool = True, errors_only: bool = False
+    ) -> Iterator["MypyMessage"]:
+        """
+        Given lines from `mypy --output json`, yield a series of MypyMessage objects.
+
+        The messages match those parsed from mypy's default text output,
+        so that reports don't change when switching between the two.
+        When errors_only is True, notes and hints are skipped.
+        """
+        for line in lines:
+            if not line.strip():
+                continue
             try:
-                yield MypyMessage.from_line(line)
-            except SkipLineError:
+                data = serialization.loads(line)
+                message_type = sys.intern(data["severity"])
+                filename = sys.intern(data["file"])
+                line_number = data["line"]
+                message = data["message"]
+                code = data["code"]
+                hint = data["hint"]
+            except (ValueError, KeyError, TypeError) as error:
+                # This is most likely mypy's text output passed to --input-format json.
+                raise InvalidJsonLineError(
+                    "Expected the output of `mypy --output json`, "
+                    "but found a line that isn't a mypy message in JSON format:\n\n"
+                    f"    {line.rstrip()}"
+                ) from error
+
+            if code and (message_type == "error" or code in _NOTE_CODES_SHOWN):
+                # The text output shows error codes at the end of error messages,
+                # and of the few notes that mypy shows codes for.
+                message = f"{message}  [{code}]"
+            message = sys.intern(message)
+
+            if line_number < 0:
+                # Mypy reports file-level issues without a line number.
+                # Stop, as we do for the same message in the text output.
+                raise _filename_without_line_number_error(
+                    f"{filename}: {message_type}: {message}"
+                )
+            if errors_only and message_type != "error":
                 continue
 
+            raw = ""
+            if keep_raw:
+                raw = f"{filename}:{line_number}: {message_type}: {message}"
+            yield cls(filename, line_number, message, message_type, raw)
+
+            # The text output shows hints as notes on the following lines.
+            if hint and not errors_only:
+                for hint_line in map(sys.intern, hint.splitlines()):
+                    raw = ""
+                    if keep_raw:
+                        raw = f"{filename}:{line_number}: note: {hint_line}"
+                    yield cls(filename, line_number, hint_line, "note", raw)
+
     @classmethod
-    def from_line(cls, line: str) -> "MypyMessage":
-        try:
-            location, message_type, message = line.strip().split(": ", 2)
-        except ValueError as e:
+    def from_line(cls, line: str, *, keep_raw: bool = True) -> "MypyMessage":
+        """
+        Parse a single line of mypy's output.
+
+        When keep_raw is False, the raw attribute is left empty.
+        """
+        message = cls._parse_line(line, keep_raw=keep_raw)
+        if message is None:
+            raise SkipLineError
+        return message
+
+    @classmethod
+    def _parse_line(cls, line: str, *, keep_raw: bool) -> Optional["MypyMessage"]:
+        # Lines that aren't messages return None rather than raising SkipLineError,
+        # because there can be a lot of them, and raising is far slower than a check.
+        # Lines look like "filename:line_number[:column]: message_type: message".
+        # str.partition is used rather than str.split or a regex because it's
+        # the cheapest way to do this in CPython, and this runs for every line.
+        # Mypy doesn't indent its messages, so only trailing whitespace is removed.
+        line = line.rstrip()
+        location, _, rest = line.partition(": ")
+        message_type, separator, message = rest.partition(": ")
+        if not separator:
             # Expected to happen on summary lines.
             # We could avoid this by requiring --no-error-summary
-            raise SkipLineError from e
+            return None
 
-        try:
-            filename, line_number, *_ = location.split(":")
-        except ValueError:
+        filename, separator, position = location.partition(":")
+        if not separator:
             # This happens if the line contains a filename but no line number.
             # We don't have any good way of handling those error messages right now,
             # and in most cases it's probably an indicator of mypy warning about a problem with the file as a whole.
             # In these cases we want the parsing to stop and emit the line that couldn't be parsed.
-            raise FilenameWithoutLineNumberError(
-                "Error message from mypy contains a filename but no line number. "
-                "This is normally an indication of a file-level issue reported by mypy. "
-                "Please correct this and try again. The error emitted from mypy is:\n\n"
-                f"    {line.strip()}"
-            )
-
-        return MypyMessage(
-            filename=filename,
-            line_number=int(line_number),
-            message=message,
-            message_type=message_type,
-            raw=line.rstrip(),
+            raise _filename_without_line_number_error(line)
+        line_number, _, _ = position.partition(":")
+
+        # Mypy repeats the same filenames, message types and messages many times.
+        # Interning them means we only keep one copy of each in memory,
+        # and dict lookups on them can short-circuit on identity.
+        # Arguments are passed by position because it's faster than by keyword.
+        return cls(
+            sys.intern(filename),
+            int(line_number),
+            sys.intern(message),
+            sys.intern(message_type),
+            line if keep_raw else "",
         )
 
 
@@ -134,20 +282,21 @@ class ErrorCounter:
     """
 
     def __init__(self, report_writer: Callable[[str], Any], indentation: int) -> None:
-        self.grouped_errors: ErrorSummary = defaultdict(Counter)
+        self.grouped_errors: defaultdict[str, Counter[str]] = defaultdict(Counter)
         self.report_writer = report_writer
         self.indentation = indentation
 
-    def process_messages(self, filename: str, messages: list[MypyMessage]) -> None:
-        error_strings = (m.message for m in messages if m.message_type == "error")
-        counted_errors = Counter(error_strings)
-        if counted_errors:
-            self.grouped_errors[filename] = counted_errors
+    def process_messages(self, filename: str, messages: Iterable[MypyMessage]) -> None:
+        # Add to any errors already counted for this file rather than replacing them.
+        counted_errors = self.grouped_errors[filename]
+        counted_errors.update(m.message for m in messages if m.message_type == "error")
+        if not counted_errors:
+            # Files with notes but no errors are left out of the report.
+            del self.grouped_errors[filename]
 
     def write_report(self) -> ExitCode:
         errors = self.grouped_errors
-        error_json = json.dumps(errors, sort_keys=True, indent=self.indentation)
-        self.report_writer(error_json + "\n")
+        self.report_writer(serialization.dumps(errors, indentation=self.indentation))
         return ExitCode.SUCCESS
 
 
@@ -195,6 +344,13 @@ class ColorChangeReportWriter:
     _YELLOW = "\033[33m"
     _BLUE = "\033[34m"
 
+    # The labels are the same on every line, so only style them once.
+    _ERROR_LABEL = f"{_BOLD_RED} error: {_RESET}"
+    _NOTE_LABEL = f"{_BLUE} note: {_RESET}"
+
+    _QUOTED = re.compile(r'"[^"]*"')
+    _BOLD_QUOTED = rf"{_BOLD}\g<0>{_RESET}"
+
     def __init__(self, _write: Callable[[str], Any] = sys.stdout.write) -> None:
         self.write = _write
 
@@ -216,14 +372,7 @@ class ColorChangeReportWriter:
     def _highlight_quotes(self, msg: str) -> str:
         if msg.count('"') % 2:
             return msg
-        parts = msg.split('"')
-        out = ""
-        for i, part in enumerate(parts):
-            if i % 2 == 0:
-                out += part
-            else:
-                out += self._style(self._BOLD, f'"{part}"')
-        return out
+        return self._QUOTED.sub(self._BOLD_QUOTED, msg)
 
     def _format_line(self, line: str) -> str:
         if ": error: " in line:
@@ -239,18 +388,11 @@ class ColorChangeReportWriter:
                 code = ""
 
             return (
-                location
-                + self._style(self._BOLD_RED, " error: ")
-                + self._highlight_quotes(error_msg)
-                + code
+                location + self._ERROR_LABEL + self._highlight_quotes(error_msg) + code
             )
         if ": note: " in line:
             location, _, message = line.partition(" note: ")
-            return (
-                location
-                + self._style(self._BLUE, " note: ")
-                + self._highlight_quotes(message)
-            )
+            return location + self._NOTE_LABEL + self._highlight_quotes(message)
         return line
 
 
@@ -274,29 +416,46 @@ class ChangeTracker:
         self.num_new_errors = 0
         self.num_fixed_errors = 0
 
-    def process_messages(self, filename: str, messages: list[MypyMessage]) -> None:
-        error_frequencies: Counter[str] = Counter()
-        messages_by_line_number: dict[int, list[str]] = defaultdict(list)
-        line_numbers_by_error: dict[str, list[int]] = defaultdict(list)
-
-        for message in messages:
-            if message.message_type == "error":
-                self.num_errors += 1
-                error_frequencies.update([message.message])
-                line_numbers_by_error[message.message].append(message.line_number)
-            messages_by_line_number[message.line_number].append(message.raw)
-
-        old_report_counter: Counter[str] = Counter(self.old_report.pop(filename, None))
-        new_errors_in_file = error_frequencies - old_report_counter
-
-        self.num_new_errors += sum(new_errors_in_file.values())
-        for new_error in new_errors_in_file:
-            for line_number in line_numbers_by_error[new_error]:
-                self.error_lines.extend(messages_by_line_number.pop(line_number, []))
+    def process_messages(self, filename: str, messages: Sequence[MypyMessage]) -> None:
+        errors = [m.message for m in messages if m.message_type == "error"]
+        self.num_errors += len(errors)
+        error_frequencies = Counter(errors)
+
+        old_errors = self.old_report.pop(filename, {})
+        if error_frequencies == old_errors:
+            # Most files are unchanged, so skip comparing them error by error.
+            return
+
+        # Compare against the old report in a single pass over each side,
+        # rather than building two intermediate Counters by subtraction.
+        new_errors_in_file: list[str] = []
+        for error, frequency in error_frequencies.items():
+            increase = frequency - old_errors.get(error, 0)
+            if increase > 0:
+                new_errors_in_file.append(error)
+                self.num_new_errors += increase
+
+        # Most files have no new errors, so only index the messages by line
+        # number when we need to show some of them.
+        if new_errors_in_file:
+            messages_by_line_number: dict[int, list[str]] = defaultdict(list)
+            line_numbers_by_error: dict[str, list[int]] = defaultdict(list)
+            for message in messages:
+                if message.message_type == "error":
+                    line_numbers_by_error[message.message].append(message.line_number)
+                messages_by_line_number[message.line_number].append(message.raw)
+
+            for new_error in new_errors_in_file:
+                for line_number in line_numbers_by_error[new_error]:
+                    self.error_lines.extend(
+                        messages_by_line_number.pop(line_number, [])
+                    )
 
         # Find counts for errors resolved.
-        resolved_errors = old_report_counter - error_frequencies
-        self.num_fixed_errors += sum(resolved_errors.values())
+        for error, old_frequency in old_errors.items():
+            decrease = old_frequency - error_frequencies[error]
+            if decrease > 0:
+                self.num_fixed_errors += decrease
 
     def diff_report(self) -> DiffReport:
         unseen_errors = sum(sum(errors.values()) for errors in self.old_report.values())
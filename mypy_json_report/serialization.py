@@ -0,0 +1,69 @@
+# Copyright 2022 Memrise
+
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+
+#     http://www.apache.org/licenses/LICENSE-2.0
+
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import json
+from typing import Any, Union
+
+
+try:
+    import orjson
+except ImportError:
+    # orjson is an optional dependency. Fall back to the standard library.
+    orjson = None  # type: ignore[assignment]
+
+# orjson can only indent JSON with two spaces.
+_ORJSON_INDENTATION = 2
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """
+    Deserialize a JSON document, using orjson when it is available.
+
+    orjson rejects escaped lone surrogates, which the standard library
+    (and so dumps) writes for undecodable filenames, so fall back to it then.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data)
+
+
+def dumps(obj: Any, indentation: int) -> str:
+    """
+    Serialize an object to JSON with sorted keys, followed by a newline.
+
+    The output is always identical to `json.dumps(obj, sort_keys=True, indent=indentation) + "\n"`.
+
+    orjson is used when it is available and able to produce that output.
+    It doesn't escape non-ASCII characters, so we fall back to the standard
+    library when the output contains any. It also refuses strings containing
+    lone surrogates, which stdin produces for undecodable bytes under a C locale.
+    """
+    if orjson is not None and indentation == _ORJSON_INDENTATION:
+        try:
+            # Have orjson append the newline, to avoid copying the whole report.
+            encoded = orjson.dumps(
+                obj,
+                option=orjson.OPT_SORT_KEYS
+                | orjson.OPT_INDENT_2
+                | orjson.OPT_APPEND_NEWLINE,
+            )
+        except orjson.JSONEncodeError:
+            pass
+        else:
+            if encoded.isascii() and b"\x7f" not in encoded:
+                return encoded.decode()
+    return json.dumps(obj, sort_keys=True, indent=indentation) + "\n"
@@ -3,6 +3,8 @@ from unittest import mock
 
 import pytest
 
+from mypy_json_report import serialization
+from mypy_json_report.exit_codes import ExitCode
 from mypy_json_report.parse import (
     ChangeTracker,
     ColorChangeReportWriter,
@@ -10,8 +12,10 @@ from mypy_json_report.parse import (
     DiffReport,
     ErrorCounter,
     FilenameWithoutLineNumberError,
+    InvalidJsonLineError,
     MypyMessage,
     SkipLineError,
+    parse_message_lines,
 )
 
 
@@ -55,6 +59,32 @@ class TestMypyMessageFromLine:
             raw='test.py:88:16: error: Item "None" of "Optional[Dict[str, Any]]" has no attribute "get"  [union-attr]',
         )
 
+    def test_message_containing_separator(self) -> None:
+        line = 'test.py:8: error: Dict entry 0 has incompatible type "str": "int"  [dict-item]\n'
+
+        message = MypyMessage.from_line(line)
+
+        assert message == MypyMessage(
+            filename="test.py",
+            line_number=8,
+            message='Dict entry 0 has incompatible type "str": "int"  [dict-item]',
+            message_type="error",
+            raw='test.py:8: error: Dict entry 0 has incompatible type "str": "int"  [dict-item]',
+        )
+
+    def test_without_raw(self) -> None:
+        line = "test.py:8: error: Function is missing a return type annotation\n"
+
+        message = MypyMessage.from_line(line, keep_raw=False)
+
+        assert message == MypyMessage(
+            filename="test.py",
+            line_number=8,
+            message="Function is missing a return type annotation",
+            message_type="error",
+            raw="",
+        )
+
     def test_summary_line(self) -> None:
         line = "Found 2 errors in 1 file (checked 3 source files)\n"
 
@@ -93,6 +123,265 @@ class TestMypyMessageFromLine:
             ),
         ]
 
+    def test_errors_only(self) -> None:
+        lines = [
+            "test.py:8: error: Function is missing a return type annotation\n",
+            'test.py:8: note: Use "-> None" if function does not return a value\n',
+            "Found 1 error in 1 file (checked 3 source files)\n",
+        ]
+
+        messages = list(MypyMessage.from_lines(lines, errors_only=True))
+
+        assert messages == [
+            MypyMessage(
+                filename="test.py",
+                line_number=8,
+                message="Function is missing a return type annotation",
+                message_type="error",
+                raw="test.py:8: error: Function is missing a return type annotation",
+            )
+        ]
+
+    def test_file_level_note(self) -> None:
+        lines = ['test.py: note: In function "f":\n']
+
+        with pytest.raises(FilenameWithoutLineNumberError):
+            list(MypyMessage.from_lines(lines))
+
+        with pytest.raises(FilenameWithoutLineNumberError):
+            list(MypyMessage.from_lines(lines, errors_only=True))
+
+    def test_errors_only_skips_summary(self) -> None:
+        lines = [
+            "Success: no issues found in 1 source file\n",
+            "Found 2 errors in 1 file (checked 1 source file)\n",
+        ]
+
+        assert list(MypyMessage.from_lines(lines, errors_only=True)) == []
+
+
+class TestMypyMessageFromJsonLines:
+    def test_error_with_code(self) -> None:
+        lines = [
+            '{"file": "test.py", "line": 8, "column": 0, "message": "Function is missing a return type annotation", "hint": null, "code": "no-untyped-def", "severity": "error"}\n'
+        ]
+
+        messages = list(MypyMessage.from_json_lines(lines))
+
+        assert messages == [
+            MypyMessage(
+                filename="test.py",
+                line_number=8,
+                message="Function is missing a return type annotation  [no-untyped-def]",
+                message_type="error",
+                raw="test.py:8: error: Function is missing a return type annotation  [no-untyped-def]",
+            )
+        ]
+
+    def test_error_with_hint(self) -> None:
+        lines = [
+            '{"file": "test.py", "line": 7, "column": 0, "message": "Cannot find module", "hint": "See the docs\\nfor more info", "code": null, "severity": "error"}\n'
+        ]
+
+        messages = list(MypyMessage.from_json_lines(lines))
+
+        assert messages == [
+            MypyMessage(
+                filename="test.py",
+                line_number=7,
+                message="Cannot find module",
+                message_type="error",
+                raw="test.py:7: error: Cannot find module",
+            ),
+            MypyMessage(
+                filename="test.py",
+                line_number=7,
+                message="See the docs",
+                message_type="note",
+                raw="test.py:7: note: See the docs",
+            ),
+            MypyMessage(
+                filename="test.py",
+                line_number=7,
+                message="for more info",
+                message_type="note",
+                raw="test.py:7: note: for more info",
+            ),
+        ]
+
+    def test_note_without_raw(self) -> None:
+        lines = [
+            "\n",
+            '{"file": "test.py", "line": 9, "column": 12, "message": "Revealed type is \\"int\\"", "hint": null, "code": "misc", "severity": "note"}\n',
+        ]
+
+        messages = list(MypyMessage.from_json_lines(lines, keep_raw=False))
+
+        assert messages == [
+            MypyMessage(
+                filename="test.py",
+                line_number=9,
+                message='Revealed type is "int"',
+                message_type="note",
+                raw="",
+            )
+        ]
+
+    def test_note_with_shown_code(self) -> None:
+        lines = [
+            '{"file": "test.py", "line": 3, "column": 4, "message": "By default the bodies of untyped functions are not checked", "hint": null, "code": "annotation-unchecked", "severity": "note"}\n'
+        ]
+
+        messages = list(MypyMessage.from_json_lines(lines))
+
+        assert messages == [
+            MypyMessage(
+                filename="test.py",
+                line_number=3,
+                message="By default the bodies of untyped functions are not checked  [annotation-unchecked]",
+                message_type="note",
+                raw="test.py:3: note: By default the bodies of untyped functions are not checked  [annotation-unchecked]",
+            )
+        ]
+
+    def test_undecodable_filename(self) -> None:
+        lines = [
+            '{"file": "caf\\udce9.py", "line": 1, "column": 0, "message": "Bad thing", "hint": null, "code": null, "severity": "error"}\n'
+        ]
+
+        messages = list(MypyMessage.from_json_lines(lines))
+
+        assert messages == [
+            MypyMessage(
+                filename="caf\udce9.py",
+                line_number=1,
+                message="Bad thing",
+                message_type="error",
+                raw="caf\udce9.py:1: error: Bad thing",
+            )
+        ]
+
+    def test_file_level_error(self) -> None:
+        lines = [
+            '{"file": "b/m.py", "line": -1, "column": -1, "message": "Duplicate module named \\"m\\" (also at \\"a/m.py\\")", "hint": null, "code": null, "severity": "error"}\n'
+        ]
+
+        with pytest.raises(FilenameWithoutLineNumberError) as exc_info:
+            list(MypyMessage.from_json_lines(lines))
+
+        assert str(exc_info.value).endswith(
+            '    b/m.py: error: Duplicate module named "m" (also at "a/m.py")'
+        )
+
+    def test_text_output(self) -> None:
+        lines = ["test.py:8: error: Function is missing a return type annotation\n"]
+
+        with pytest.raises(InvalidJsonLineError) as exc_info:
+            list(MypyMessage.from_json_lines(lines))
+
+        assert str(exc_info.value).endswith(
+            "    test.py:8: error: Function is missing a return type annotation"
+        )
+
+    def test_missing_key(self) -> None:
+        lines = ['{"file": "test.py", "line": 8, "message": "An example type error"}\n']
+
+        with pytest.raises(InvalidJsonLineError):
+            list(MypyMessage.from_json_lines(lines))
+
+    def test_errors_only(self) -> None:
+        lines = [
+            '{"file": "test.py", "line": 7, "column": 0, "message": "Cannot find module", "hint": "See the docs", "code": null, "severity": "error"}\n',
+            '{"file": "test.py", "line": 9, "column": 12, "message": "Revealed type is \\"int\\"", "hint": null, "code": "misc", "severity": "note"}\n',
+        ]
+
+        messages = list(
+            MypyMessage.from_json_lines(lines, keep_raw=False, errors_only=True)
+        )
+
+        assert messages == [
+            MypyMessage(
+                filename="test.py",
+                line_number=7,
+                message="Cannot find module",
+                message_type="error",
+                raw="",
+            )
+        ]
+
+
+class TestParseMessageLines:
+    def test_counts_errors_across_notes_and_summary(self) -> None:
+        writer = mock.MagicMock(autospec=sys.stdout.write)
+        error_counter = ErrorCounter(report_writer=writer, indentation=0)
+        lines = [
+            "file.py:1: error: An example type error\n",
+            "file.py:1: note: An example note\n",
+            "file.py:2: error: An example type error\n",
+            "Found 2 errors in 1 file (checked 1 source file)\n",
+        ]
+
+        exit_code = parse_message_lines([error_counter], lines)
+
+        assert exit_code is ExitCode.SUCCESS
+        assert error_counter.grouped_errors == {"file.py": {"An example type error": 2}}
+
+    def test_feeds_messages_to_every_processor(self) -> None:
+        error_counter = ErrorCounter(report_writer=mock.MagicMock(), indentation=0)
+        tracker = ChangeTracker(summary={}, report_writer=mock.MagicMock())
+        lines = [
+            "file.py:1: error: An example type error\n",
+            "file.py:1: note: An example note\n",
+        ]
+
+        exit_code = parse_message_lines([error_counter, tracker], lines)
+
+        assert exit_code is ExitCode.ERROR_DIFF
+        assert error_counter.grouped_errors == {"file.py": {"An example type error": 1}}
+        assert tracker.diff_report() == DiffReport(
+            error_lines=[
+                "file.py:1: error: An example type error",
+                "file.py:1: note: An example note",
+            ],
+            total_errors=1,
+            num_new_errors=1,
+            num_fixed_errors=0,
+        )
+
+    def test_json_input(self) -> None:
+        error_counter = ErrorCounter(report_writer=mock.MagicMock(), indentation=0)
+        lines = [
+            '{"file": "file.py", "line": 1, "column": 0, "message": "An example type error", "hint": null, "code": "misc", "severity": "error"}\n',
+            '{"file": "file.py", "line": 2, "column": 0, "message": "An example note", "hint": null, "code": "misc", "severity": "note"}\n',
+        ]
+
+        exit_code = parse_message_lines([error_counter], lines, input_format="json")
+
+        assert exit_code is ExitCode.SUCCESS
+        assert error_counter.grouped_errors == {
+            "file.py": {"An example type error  [misc]": 1}
+        }
+
+    def test_files_out_of_order(self) -> None:
+        tracker = ChangeTracker(
+            summary={"file.py": {"An example type error": 2}},
+            report_writer=mock.MagicMock(),
+        )
+        lines = [
+            "file.py:1: error: An example type error\n",
+            "other.py:1: error: An example type error\n",
+            "file.py:2: error: An example type error\n",
+        ]
+
+        parse_message_lines([tracker], lines)
+
+        assert tracker.diff_report() == DiffReport(
+            error_lines=["other.py:1: error: An example type error"],
+            total_errors=3,
+            num_new_errors=1,
+            num_fixed_errors=0,
+        )
+
 
 class TestErrorCounter:
     def test_new_unseen_error(self) -> None:
@@ -111,6 +400,15 @@ class TestErrorCounter:
 
         assert error_counter.grouped_errors == {"file.py": {"An example type error": 2}}
 
+    def test_errors_counted_across_calls(self) -> None:
+        error_counter = ErrorCounter(report_writer=mock.MagicMock(), indentation=0)
+        message = MypyMessage.from_line("file.py:8: error: An example type error")
+
+        error_counter.process_messages("file.py", [message])
+        error_counter.process_messages("file.py", [message])
+
+        assert error_counter.grouped_errors == {"file.py": {"An example type error": 2}}
+
     def test_notes_uncounted(self) -> None:
         error_counter = ErrorCounter(report_writer=mock.MagicMock(), indentation=0)
         message = MypyMessage.from_line("file.py:8: note: An example note")
@@ -140,6 +438,67 @@ class TestErrorCounter:
             '{\n"file.py": {\n"An example type error": 1\n}\n}\n'
         )
 
+    def test_write_report_with_default_indentation(self) -> None:
+        writer = mock.MagicMock(autospec=sys.stdout.write)
+        error_counter = ErrorCounter(report_writer=writer, indentation=2)
+        message = MypyMessage.from_line('file.py:8: error: Name "x" is not defined')
+        error_counter.process_messages("file.py", [message])
+
+        error_counter.write_report()
+
+        writer.assert_called_once_with(
+            '{\n  "file.py": {\n    "Name \\"x\\" is not defined": 1\n  }\n}\n'
+        )
+
+    @mock.patch("mypy_json_report.serialization.orjson", None)
+    def test_write_report_without_orjson(self) -> None:
+        writer = mock.MagicMock(autospec=sys.stdout.write)
+        error_counter = ErrorCounter(report_writer=writer, indentation=2)
+        message = MypyMessage.from_line('file.py:8: error: Name "x" is not defined')
+        error_counter.process_messages("file.py", [message])
+
+        error_counter.write_report()
+
+        writer.assert_called_once_with(
+            '{\n  "file.py": {\n    "Name \\"x\\" is not defined": 1\n  }\n}\n'
+        )
+
+    def test_write_report_escapes_non_ascii(self) -> None:
+        writer = mock.MagicMock(autospec=sys.stdout.write)
+        error_counter = ErrorCounter(report_writer=writer, indentation=2)
+        message = MypyMessage.from_line('file.py:8: error: Name "café" is not defined')
+        error_counter.process_messages("file.py", [message])
+
+        error_counter.write_report()
+
+        writer.assert_called_once_with(
+            '{\n  "file.py": {\n    "Name \\"caf\\u00e9\\" is not defined": 1\n  }\n}\n'
+        )
+
+    def test_write_report_escapes_surrogates(self) -> None:
+        # Undecodable bytes on stdin become lone surrogates under a C locale.
+        writer = mock.MagicMock(autospec=sys.stdout.write)
+        error_counter = ErrorCounter(report_writer=writer, indentation=2)
+        message = MypyMessage.from_line("caf\udce9.py:1: error: Bad thing")
+        error_counter.process_messages(message.filename, [message])
+
+        error_counter.write_report()
+
+        writer.assert_called_once_with(
+            '{\n  "caf\\udce9.py": {\n    "Bad thing": 1\n  }\n}\n'
+        )
+
+    def test_report_with_surrogates_can_be_read_back(self) -> None:
+        reports: list[str] = []
+        error_counter = ErrorCounter(report_writer=reports.append, indentation=2)
+        message = MypyMessage.from_line("caf\udce9.py:1: error: Bad thing")
+        error_counter.process_messages(message.filename, [message])
+        error_counter.write_report()
+
+        summary = serialization.loads(reports[0].encode())
+
+        assert summary == {"caf\udce9.py": {"Bad thing": 1}}
+
 
 class TestChangeTracker:
     def test_no_errors(self) -> None:
@@ -481,3 +840,26 @@ class TestColorChangeReportWriter:
             "\x1b[31;1mNew errors: 1\n\x1b[0m",
             "\x1b[1mTotal errors: 2\n\x1b[0m",
         ]
+
+    def test_with_quotes(self) -> None:
+        messages: list[str] = []
+        writer = ColorChangeReportWriter(_write=messages.append)
+
+        writer.write_report(
+            DiffReport(
+                error_lines=[
+                    'file.py:8: error: Name "x" is not defined',
+                    'file.py:8: note: Did you mean "y" or "z"?',
+                    'file.py:9: error: Unbalanced " quote',
+                ],
+                total_errors=2,
+                num_new_errors=2,
+                num_fixed_errors=0,
+            )
+        )
+
+        assert messages[0] == (
+            'file.py:8:\x1b[31;1m error: \x1b[0mName \x1b[1m"x"\x1b[0m is not defined\n'
+            'file.py:8:\x1b[34m note: \x1b[0mDid you mean \x1b[1m"y"\x1b[0m or \x1b[1m"z"\x1b[0m?\n'
+            'file.py:9:\x1b[31;1m error: \x1b[0mUnbalanced " quote\n\n'
+        )